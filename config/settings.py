@@ -2,28 +2,69 @@
 Configuration settings and constants for the skin disease detection app
 """
 
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import FrozenSet, Optional, Tuple
 import streamlit as st
 import os
 
-# Model and file paths
-IMAGE_SIZE = (224, 224)
 MODEL_DIR = Path("models")
-MODEL_H5 = MODEL_DIR / "best_model.h5"
-MODEL_PKL = MODEL_DIR / "best_model.pkl"
-CLASSES_JSON = MODEL_DIR / "classes.json"
 
-# File validation settings
-MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
-SUPPORTED_FORMATS = ['jpg', 'jpeg', 'png']
+@dataclass(frozen=True)
+class Settings:
+    """Application settings, resolved once from st.secrets and the environment"""
+    # Model and file paths
+    image_size: Tuple[int, int] = (224, 224)
+    model_dir: Path = MODEL_DIR
+    model_h5: Path = MODEL_DIR / "best_model.h5"
+    model_pkl: Path = MODEL_DIR / "best_model.pkl"
+    model_tflite: Path = MODEL_DIR / "best_model.tflite"
+    classes_json: Path = MODEL_DIR / "classes.json"
 
-# Severity thresholds
-THRESHOLD_MILD = float(st.secrets.get("THRESHOLD_MILD", 0.45)) if "THRESHOLD_MILD" in st.secrets else 0.45
-THRESHOLD_SEVERE = float(st.secrets.get("THRESHOLD_SEVERE", 0.80)) if "THRESHOLD_SEVERE" in st.secrets else 0.80
+    # File validation settings
+    max_file_size: int = 10 * 1024 * 1024  # 10MB
+    supported_formats: Tuple[str, ...] = ('jpg', 'jpeg', 'png')
 
-# High-risk diseases (can be loaded from secrets)
-HIGH_RISK_DISEASES = st.secrets.get("HIGH_RISK_DISEASES", [])
+    # Severity thresholds
+    threshold_mild: float = 0.45
+    threshold_severe: float = 0.80
 
-# API Keys
-GEMINI_API_KEY = st.secrets.get("GEMINI_API_KEY", os.environ.get("GEMINI_API_KEY"))
-WEIGHTS_URL = st.secrets.get("WEIGHTS_URL") or os.environ.get("WEIGHTS_URL")
\ No newline at end of file
+    # High-risk diseases (can be loaded from secrets)
+    high_risk_diseases: FrozenSet[str] = field(default_factory=frozenset)
+
+    # API Keys
+    gemini_api_key: Optional[str] = None
+    weights_url: Optional[str] = None
+
+    # Include the full per-class probability map in prediction results
+    debug: bool = False
+
+def _read_secrets() -> dict:
+    """Snapshot st.secrets into a plain dict (empty if no secrets file exists)"""
+    # Only a missing file means "no secrets"; a malformed secrets.toml must
+    # still raise rather than silently reverting keys and thresholds
+    secret_files = [Path(p).expanduser() for p in st.get_option("secrets.files")]
+    if not any(p.is_file() for p in secret_files):
+        return {}
+    return dict(st.secrets)
+
+def _as_name_set(value) -> FrozenSet[str]:
+    """Normalise a secret holding one name or a list of names to a frozenset"""
+    # A bare string must not be split into its characters
+    if isinstance(value, str):
+        return frozenset([value])
+    return frozenset(value)
+
+def _load() -> Settings:
+    """Build the settings object from secrets, falling back to env/defaults"""
+    secrets = _read_secrets()
+    return Settings(
+        threshold_mild=float(secrets.get("THRESHOLD_MILD", 0.45)),
+        threshold_severe=float(secrets.get("THRESHOLD_SEVERE", 0.80)),
+        high_risk_diseases=_as_name_set(secrets.get("HIGH_RISK_DISEASES", [])),
+        gemini_api_key=secrets.get("GEMINI_API_KEY", os.environ.get("GEMINI_API_KEY")),
+        weights_url=secrets.get("WEIGHTS_URL") or os.environ.get("WEIGHTS_URL"),
+        debug=str(secrets.get("DEBUG", os.environ.get("DEBUG", ""))).lower() in ("1", "true", "yes"),
+    )
+
+SETTINGS = _load()
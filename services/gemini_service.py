@@ -2,56 +2,67 @@
 Gemini AI service for generating preventive measures and recommendations
 """
 
-import os
+import functools
+import re
 from typing import Dict, Any
 import streamlit as st
 
-from config.settings import GEMINI_API_KEY
-from utils.image_utils import image_file_to_base64
+from config.settings import SETTINGS
 
-def get_preventive_measures_from_gemini(disease: str, confidence: float, image_bytes: bytes) -> Dict[str, Any]:
+# Response parsing: numbered bullets 1-3 and the "When to see a doctor:" line
+# ([ \t] rather than \s so matches never run onto the next line)
+_BULLET_RE = re.compile(r'^[ \t]*([1-3])\.[ \t]*(.+)$', re.M)
+_DOC_RE = re.compile(r'(?im)^[ \t]*when to see a doctor:?[ \t]*(.*)$')
+
+@functools.lru_cache(maxsize=1)
+def _get_gemini_model():
+    """Configure the Gemini SDK and build the model client once per process"""
+    import google.generativeai as genai
+    genai.configure(api_key=SETTINGS.gemini_api_key)
+    return genai.GenerativeModel('gemini-1.5-flash')
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _gemini_fetch(disease: str, conf_bucket: float) -> Dict[str, Any]:
+    """Query Gemini for a (disease, confidence bucket) pair; cached for an hour"""
+    model = _get_gemini_model()
+
+    prompt = f"""
+    Disease predicted: {disease} (confidence: {conf_bucket*100:.1f}%)
+
+    Provide exactly 3 preventive measures (one sentence each) and advice on when to see a doctor.
+    Format:
+    1. [preventive measure]
+    2. [preventive measure]
+    3. [preventive measure]
+    When to see a doctor: [advice]
+    """
+
+    response = model.generate_content(prompt)
+    text = response.text
+
+    bullets = [m.group(2).strip() for m in _BULLET_RE.finditer(text)]
+    # Like the old line parser, the last "When to see a doctor" line wins
+    doc_matches = _DOC_RE.findall(text)
+    consult_line = doc_matches[-1].strip() if doc_matches else ""
+
+    # Raise rather than return so an unusable reply is not cached
+    if not bullets:
+        raise ValueError("Gemini response contained no preventive measures")
+    return {
+        "via": "gemini",
+        "bullets": bullets,
+        "consult": consult_line,
+        "advice_text": " ".join(bullets) + " " + consult_line
+    }
+
+def get_preventive_measures_from_gemini(disease: str, confidence: float) -> Dict[str, Any]:
     """Get preventive measures from Gemini AI"""
-    if GEMINI_API_KEY:
+    if SETTINGS.gemini_api_key:
         try:
-            import google.generativeai as genai
-            genai.configure(api_key=GEMINI_API_KEY)
-            model = genai.GenerativeModel('gemini-1.5-flash')
-            
-            prompt = f"""
-            Disease predicted: {disease} (confidence: {confidence*100:.1f}%)
-            
-            Provide exactly 3 preventive measures (one sentence each) and advice on when to see a doctor.
-            Format:
-            1. [preventive measure]
-            2. [preventive measure] 
-            3. [preventive measure]
-            When to see a doctor: [advice]
-            """
-            
-            response = model.generate_content(prompt)
-            text = response.text
-            
-            lines = [line.strip() for line in text.split('\n') if line.strip()]
-            bullets = []
-            consult_line = ""
-            
-            for line in lines:
-                if line.startswith(('1.', '2.', '3.')):
-                    bullets.append(line[2:].strip())
-                elif 'doctor' in line.lower():
-                    consult_line = line.replace('When to see a doctor:', '').strip()
-            
-            if bullets:
-                return {
-                    "via": "gemini",
-                    "bullets": bullets,
-                    "consult": consult_line,
-                    "advice_text": " ".join(bullets) + " " + consult_line
-                }
-                
+            return _gemini_fetch(disease, round(confidence, 1))
         except Exception as e:
             st.warning(f"Gemini API call failed: {e}")
-    
+
     return get_fallback_measures()
 
 def get_fallback_measures() -> Dict[str, Any]:
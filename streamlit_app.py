@@ -4,15 +4,12 @@ Main application entry point with clean UI layout
 """
 
 import streamlit as st
-from pathlib import Path
 
 # Import our custom modules
-from config.settings import *
+from config.settings import SETTINGS
 from styles.custom_css import inject_custom_css
-from utils.model_utils import load_model, load_class_names, predict_image
-from utils.image_utils import validate_uploaded_file, preprocess_image_bytes
+from utils.image_utils import validate_uploaded_file
 from utils.ui_components import create_header, create_stats_sidebar, create_results_display
-from services.gemini_service import get_preventive_measures_from_gemini
 
 def main():
     # Page config
@@ -23,6 +20,10 @@ def main():
         initial_sidebar_state="expanded"
     )
     
+    # Imported after set_page_config; TensorFlow itself is only imported
+    # inside load_model (cached once per process)
+    from utils.model_utils import load_model, load_class_names
+    
     # Inject custom CSS
     inject_custom_css()
     
@@ -61,8 +62,8 @@ def main():
         
         uploaded_file = st.file_uploader(
             "Choose an image file",
-            type=SUPPORTED_FORMATS,
-            help=f"Supported formats: {', '.join(SUPPORTED_FORMATS)}. Max size: {MAX_FILE_SIZE//1024//1024}MB"
+            type=SETTINGS.supported_formats,
+            help=f"Supported formats: {', '.join(SETTINGS.supported_formats)}. Max size: {SETTINGS.max_file_size//1024//1024}MB"
         )
         
         if uploaded_file is not None:
@@ -72,7 +73,7 @@ def main():
                 st.error(f"❌ {message}")
                 st.stop()
             
-            image_bytes = uploaded_file.read()
+            image_bytes = uploaded_file.getvalue()
             st.markdown('<div class="image-preview">', unsafe_allow_html=True)
             st.image(image_bytes, caption="📸 Uploaded Image", use_container_width=True)
             st.markdown('</div>', unsafe_allow_html=True)
@@ -90,41 +91,22 @@ def main():
             if st.button("🚀 Analyze Image", key="analyze_btn"):
                 result = perform_analysis(model, image_bytes, class_names)
                 if result:
-                    create_results_display(result, image_bytes)
+                    create_results_display(result)
 
 def perform_analysis(model, image_bytes, class_names):
     """Perform the complete analysis pipeline"""
-    progress_bar = st.progress(0)
-    status_text = st.empty()
+    from utils.model_utils import predict_image, compute_severity
+    from services.gemini_service import get_preventive_measures_from_gemini
     
     try:
-        # Step 1: Preprocessing
-        status_text.text("🔄 Preprocessing image...")
-        progress_bar.progress(25)
-        
-        # Step 2: Model inference
-        status_text.text("🧠 Running AI analysis...")
-        progress_bar.progress(50)
-        
-        result = predict_image(model, image_bytes, class_names)
-        
-        # Step 3: Severity calculation
-        status_text.text("📊 Computing severity...")
-        progress_bar.progress(75)
-        
-        from utils.model_utils import compute_severity
-        severity = compute_severity(result["confidence"], result["disease"])
+        with st.spinner("🧠 Running analysis..."):
+            result = predict_image(model, image_bytes, class_names)
+            severity = compute_severity(result["confidence"], result["disease"])
+            measures = get_preventive_measures_from_gemini(
+                result["disease"], result["confidence"]
+            )
         
-        # Step 4: Getting recommendations
-        status_text.text("💡 Generating recommendations...")
-        progress_bar.progress(90)
-        
-        measures = get_preventive_measures_from_gemini(
-            result["disease"], result["confidence"], image_bytes
-        )
-        
-        progress_bar.progress(100)
-        status_text.text("✅ Analysis complete!")
+        st.success("✅ Analysis complete!")
         
         # Store in session history
         st.session_state.prediction_history.append({
@@ -133,10 +115,6 @@ def perform_analysis(model, image_bytes, class_names):
             'severity': severity
         })
         
-        # Clear progress indicators
-        progress_bar.empty()
-        status_text.empty()
-        
         return {**result, 'severity': severity, 'measures': measures}
         
     except Exception as e:
@@ -4,8 +4,8 @@ Custom CSS styling for the application
 
 import streamlit as st
 
-def inject_custom_css():
-    st.markdown("""
+# Application stylesheet, injected on every script rerun
+_CUSTOM_CSS = """
     <style>
     /* Import Google Fonts */
     @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
@@ -289,4 +289,7 @@ def inject_custom_css():
     .stDeployButton {display:none;}
     
     </style>
-    """, unsafe_allow_html=True)
+    """
+
+def inject_custom_css():
+    st.markdown(_CUSTOM_CSS, unsafe_allow_html=True)
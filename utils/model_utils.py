@@ -2,18 +2,23 @@
 Model loading, prediction, and related utility functions
 """
 
+import functools
 import json
+import os
 import pickle
+import threading
 import numpy as np
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, Collection, List
 import streamlit as st
 
-from config.settings import MODEL_DIR, MODEL_H5, MODEL_PKL, CLASSES_JSON, THRESHOLD_MILD, THRESHOLD_SEVERE, HIGH_RISK_DISEASES, WEIGHTS_URL
+from config.settings import SETTINGS
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
 
 def ensure_model_dir():
     """Ensure model directory exists"""
-    MODEL_DIR.mkdir(parents=True, exist_ok=True)
+    SETTINGS.model_dir.mkdir(parents=True, exist_ok=True)
 
 def download_file(url: str, dest_path: Path):
     """Download file from URL"""
@@ -21,116 +26,218 @@ def download_file(url: str, dest_path: Path):
     dest_path.parent.mkdir(parents=True, exist_ok=True)
     with requests.get(url, stream=True, timeout=60) as r:
         r.raise_for_status()
+        total = int(r.headers.get("Content-Length", 0) or 0)
         with open(dest_path, "wb") as f:
-            for chunk in r.iter_content(chunk_size=8192):
+            # Reserve the full size up front to avoid a fragmented file
+            if total and hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(f.fileno(), 0, total)
+            for chunk in r.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
                 if chunk:
                     f.write(chunk)
+            # Drop any preallocated tail if the body was shorter than advertised
+            f.truncate()
     return dest_path
 
+@functools.lru_cache(maxsize=1)
+def _parse_classes(path: Path) -> List[str]:
+    """Parse class names from a JSON file (list, {"classes": [...]} or index map)"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        if "classes" in data and isinstance(data["classes"], list):
+            return data["classes"]
+        try:
+            return [data[str(i)] for i in range(len(data))]
+        except Exception:
+            return list(data.values())
+    elif isinstance(data, list):
+        return data
+    return []
+
 @st.cache_resource
 def load_class_names() -> List[str]:
     """Load class names from JSON file"""
-    if CLASSES_JSON.exists():
-        with open(CLASSES_JSON, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if isinstance(data, dict):
-                if "classes" in data and isinstance(data["classes"], list):
-                    return data["classes"]
-                try:
-                    return [data[str(i)] for i in range(len(data))]
-                except Exception:
-                    return list(data.values())
-            elif isinstance(data, list):
-                return data
-    return []
+    return _parse_classes(SETTINGS.classes_json) if SETTINGS.classes_json.exists() else []
 
-@st.cache_resource
-def load_model():
-    """Load the trained model"""
-    ensure_model_dir()
-    try:
-        import tensorflow as tf
-    except ImportError as e:
+def ensure_softmax_output(model, tf):
+    """Append a Softmax layer when the model outputs logits"""
+    last = model.layers[-1] if model.layers else None
+    # Only a linear head emits logits; softmax, sigmoid, etc. outputs are
+    # left alone since a softmax on top would flatten them toward uniform
+    if getattr(getattr(last, "activation", None), "__name__", "") == "linear":
+        return tf.keras.Sequential([model, tf.keras.layers.Softmax()])
+    return model
+
+def attach_inference_fn(model, tf):
+    """Attach a traced, warmed-up inference function to a Keras model"""
+    @tf.function(input_signature=[tf.TensorSpec((None, *SETTINGS.image_size, 3), tf.float32)])
+    def _infer(x):
+        return model(x, training=False)
+
+    # Warm up so the first real prediction does not pay the tracing cost
+    _infer(np.zeros((1, *SETTINGS.image_size, 3), dtype=np.float32))
+    model._infer = _infer
+    return model
+
+class TFLiteModel:
+    """Minimal predict() wrapper around a TFLite interpreter"""
+
+    def __init__(self, model_path: Path):
         try:
-            import tensorflow_cpu as tf
+            from tflite_runtime.interpreter import Interpreter
         except ImportError:
-            st.error(f"Could not import TensorFlow. Details: {e}")
-            st.stop()
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+
+        self._interpreter = Interpreter(model_path=str(model_path), num_threads=os.cpu_count())
+        self._interpreter.allocate_tensors()
+        input_details = self._interpreter.get_input_details()[0]
+        self._input_idx = input_details["index"]
+        self._input_shape = tuple(input_details["shape"])
+        self._output_idx = self._interpreter.get_output_details()[0]["index"]
+        # The interpreter is shared across sessions via st.cache_resource
+        self._lock = threading.Lock()
+
+    def predict(self, x_batch: np.ndarray) -> np.ndarray:
+        with self._lock:
+            if x_batch.shape != self._input_shape:
+                self._interpreter.resize_tensor_input(self._input_idx, x_batch.shape)
+                self._interpreter.allocate_tensors()
+                self._input_shape = x_batch.shape
+            self._interpreter.set_tensor(self._input_idx, x_batch)
+            self._interpreter.invoke()
+            return self._interpreter.get_tensor(self._output_idx)
+
+def convert_to_tflite(model, dest_path: Path = SETTINGS.model_tflite) -> Path:
+    """Convert a Keras model to an FP16-quantized TFLite flatbuffer"""
+    import tensorflow as tf
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.target_spec.supported_types = [tf.float16]
+    dest_path.parent.mkdir(parents=True, exist_ok=True)
+    dest_path.write_bytes(converter.convert())
+    return dest_path
 
+def load_keras_model(tf):
+    """Load the Keras model from h5, WEIGHTS_URL or pickle, with a softmax head"""
     # Try loading existing model
-    if MODEL_H5.exists():
+    if SETTINGS.model_h5.exists():
         try:
-            model = tf.keras.models.load_model(str(MODEL_H5), compile=False)
-            return model
+            model = tf.keras.models.load_model(str(SETTINGS.model_h5), compile=False)
+            return ensure_softmax_output(model, tf)
         except Exception as e:
-            st.warning(f"Failed to load {MODEL_H5}: {e}")
+            st.warning(f"Failed to load {SETTINGS.model_h5}: {e}")
 
     # Try downloading model
-    if WEIGHTS_URL:
+    if SETTINGS.weights_url:
         try:
-            download_file(WEIGHTS_URL, MODEL_H5)
-            model = tf.keras.models.load_model(str(MODEL_H5), compile=False)
-            return model
+            download_file(SETTINGS.weights_url, SETTINGS.model_h5)
+            model = tf.keras.models.load_model(str(SETTINGS.model_h5), compile=False)
+            return ensure_softmax_output(model, tf)
         except Exception as e:
             st.warning(f"Failed to download/load model from WEIGHTS_URL: {e}")
 
     # Try pickle format
-    if MODEL_PKL.exists():
+    if SETTINGS.model_pkl.exists():
         try:
-            with open(MODEL_PKL, "rb") as f:
+            with open(SETTINGS.model_pkl, "rb") as f:
                 model = pickle.load(f)
-            return model
+            # scikeras wrappers keep the fitted Keras model on .model_
+            model = getattr(model, "model_", model)
+            return ensure_softmax_output(model, tf)
         except Exception as e:
-            st.warning(f"Failed to unpickle {MODEL_PKL}: {e}")
+            st.warning(f"Failed to unpickle {SETTINGS.model_pkl}: {e}")
 
     raise FileNotFoundError("No model artifact found.")
 
-def predict_image(model, image_bytes: bytes, class_names: List[str]) -> Dict[str, Any]:
-    """Make prediction on image"""
-    from utils.image_utils import preprocess_image_bytes
-    
-    x = preprocess_image_bytes(image_bytes)
-    x_batch = np.expand_dims(x, axis=0)
-    
-    preds = model.predict(x_batch)
+@st.cache_resource
+def load_model():
+    """Load the trained model"""
+    ensure_model_dir()
+
+    # Prefer the quantized TFLite model if one has been generated. TensorFlow
+    # is only skipped entirely when the optional tflite_runtime package is
+    # installed; otherwise the interpreter comes from tensorflow-cpu
+    if SETTINGS.model_tflite.exists():
+        try:
+            return TFLiteModel(SETTINGS.model_tflite)
+        except Exception as e:
+            st.warning(f"Failed to load {SETTINGS.model_tflite}: {e}")
+
+    try:
+        import tensorflow as tf
+    except ImportError as e:
+        try:
+            import tensorflow_cpu as tf
+        except ImportError:
+            st.error(f"Could not import TensorFlow. Details: {e}")
+            st.stop()
+
+    return attach_inference_fn(load_keras_model(tf), tf)
+
+def _predict_array(model, x_batch: np.ndarray, class_names: List[str], top_k: int = 5) -> List[Dict[str, Any]]:
+    """Run one forward pass over an (N, H, W, 3) batch"""
+    infer = getattr(model, "_infer", None)
+    if infer is not None:
+        preds = infer(x_batch).numpy()
+    else:
+        preds = model.predict(x_batch)
     if isinstance(preds, (list, tuple)):
         preds = preds[0]
-    preds = np.asarray(preds).reshape(-1)
-    
-    s = float(np.sum(preds))
-    if s <= 0:
-        probs = np.ones_like(preds) / len(preds)
-    else:
-        probs = preds / s
+    # Outputs are assumed to be probabilities: Keras logit heads get a
+    # Softmax at load time, other heads and .tflite files are used as-is
+    probs = np.asarray(preds, dtype=np.float32).reshape(len(x_batch), -1)
 
-    top_idx = int(np.argmax(probs))
-    top_conf = float(probs[top_idx])
-    if class_names and len(class_names) > top_idx:
-        top_label = class_names[top_idx]
-    else:
-        top_label = str(top_idx)
+    n_classes = probs.shape[1]
+    names = class_names if (class_names and len(class_names) >= n_classes) else [str(i) for i in range(n_classes)]
 
-    probs_map = {}
-    for i, p in enumerate(probs):
-        name = class_names[i] if (class_names and i < len(class_names)) else str(i)
-        probs_map[name] = float(p)
+    # Select the top-k classes per row without fully sorting every class
+    k = max(1, min(top_k, n_classes))
+    top = np.argpartition(-probs, k - 1, axis=1)[:, :k]
+    top = np.take_along_axis(top, np.argsort(-np.take_along_axis(probs, top, axis=1), axis=1), axis=1)
 
-    return {
-        "class_id": top_idx,
-        "disease": top_label,
-        "confidence": top_conf,
-        "probabilities": probs_map,
-    }
+    results = []
+    for row, idx in zip(probs, top.tolist()):
+        top_probs = row[idx].tolist()
+        result = {
+            "class_id": idx[0],
+            "disease": names[idx[0]],
+            "confidence": top_probs[0],
+            "top_k": {names[i]: p for i, p in zip(idx, top_probs)},
+        }
+        if SETTINGS.debug:
+            result["probabilities"] = dict(zip(names, row.tolist()))
+        results.append(result)
+    return results
 
-def compute_severity(confidence: float, disease_name: str, high_risk_diseases: List[str] = None) -> str:
+def predict_images_batch(model, arrs: List[np.ndarray], class_names: List[str], top_k: int = 5) -> List[Dict[str, Any]]:
+    """Run one forward pass over a list of preprocessed images"""
+    if not arrs:
+        return []
+    return _predict_array(model, np.stack(arrs, axis=0), class_names, top_k)
+
+def predict_image(model, image_bytes: bytes, class_names: List[str], top_k: int = 5) -> Dict[str, Any]:
+    """Make prediction on image"""
+    from utils.image_utils import preprocess_image_bytes
+    
+    x = preprocess_image_bytes(image_bytes)
+    # x[np.newaxis] is a view, so no batch buffer is allocated or copied
+    return _predict_array(model, x[np.newaxis], class_names, top_k)[0]
+
+def compute_severity(confidence: float, disease_name: str, high_risk_diseases: Collection[str] = None) -> str:
     """Compute severity level based on confidence and disease type"""
     if high_risk_diseases is None:
-        high_risk_diseases = HIGH_RISK_DISEASES
+        high_risk_diseases = SETTINGS.high_risk_diseases
     
     if disease_name in high_risk_diseases:
         return "severe"
-    if confidence < THRESHOLD_MILD:
+    if confidence < SETTINGS.threshold_mild:
         return "mild"
-    if confidence < THRESHOLD_SEVERE:
+    if confidence < SETTINGS.threshold_severe:
         return "moderate"
-    return "severe"
\ No newline at end of file
+    return "severe"
+
+if __name__ == "__main__":
+    # One-off conversion: python -m utils.model_utils
+    import tensorflow as tf
+    print(f"Wrote {convert_to_tflite(load_keras_model(tf))}")
@@ -3,8 +3,6 @@ Reusable UI components and display functions
 """
 
 import streamlit as st
-import plotly.graph_objects as go
-import plotly.express as px
 
 def create_header():
     """Create the main application header"""
@@ -37,16 +35,16 @@ def create_stats_sidebar():
             </div>
             """, unsafe_allow_html=True)
         
-        from config.settings import THRESHOLD_MILD, THRESHOLD_SEVERE
+        from config.settings import SETTINGS
         st.markdown("### ⚙️ Configuration")
-        st.info(f"**Severity Thresholds:**\n- Mild: < {THRESHOLD_MILD*100:.0f}%\n- Severe: ≥ {THRESHOLD_SEVERE*100:.0f}%")
+        st.info(f"**Severity Thresholds:**\n- Mild: < {SETTINGS.threshold_mild*100:.0f}%\n- Severe: ≥ {SETTINGS.threshold_severe*100:.0f}%")
         
         st.markdown("### 🔒 Privacy & Safety")
         st.success("✅ Images processed securely")
         st.success("✅ No data stored permanently")
         st.success("✅ HIPAA compliant processing")
 
-def create_results_display(result, image_bytes):
+def create_results_display(result):
     """Display analysis results"""
     severity = result['severity']
     measures = result['measures']